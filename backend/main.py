@@ -1,17 +1,100 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import sqlite3
-import json
-import base64
-import uuid
-from datetime import datetime
+import orjson
+import pybase64
+import zstandard
+import queue
+import glob
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
 import os
+import time
 
 # Initialize FastAPI app
-app = FastAPI(title="Drawing App API", version="1.0.0")
+app = FastAPI(title="Drawing App API", version="1.0.0", default_response_class=ORJSONResponse)
+
+class MaxBodySizeMiddleware:
+    """Reject request bodies larger than max_body_size with 413
+    
+    Declared lengths are refused before anything is read; chunked bodies are
+    counted as they stream in and cut off once they pass the limit.
+    """
+    
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        for name, value in scope["headers"]:
+            if name == b"content-length" and int(value) > self.max_body_size:
+                response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+                await response(scope, receive, send)
+                return
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+class UnhandledErrorMiddleware:
+    """Turn unexpected exceptions into a 500 JSON response
+    
+    Starlette answers them from its outermost middleware, outside CORS, so
+    browsers would see a CORS failure instead of the error. Added before
+    CORSMiddleware, this answers inside it. The exception is re-raised
+    afterwards so the server still logs it.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response_started = False
+        
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, tracking_send)
+        except Exception as exc:
+            if not response_started:
+                response = JSONResponse({"detail": str(exc)}, status_code=500)
+                await response(scope, receive, send)
+            raise
+
+# Bound request bodies before FastAPI buffers and validates them
+app.add_middleware(MaxBodySizeMiddleware, max_body_size=20_000_000)
+
+# Must sit inside CORSMiddleware, so it is added before it
+app.add_middleware(UnhandledErrorMiddleware)
 
 # Enable CORS
 app.add_middleware(
@@ -22,30 +105,468 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Endpoints raise HTTPException for expected failures; anything else is
+# turned into a response here or by UnhandledErrorMiddleware instead of
+# being wrapped in every handler
+@app.exception_handler(sqlite3.IntegrityError)
+async def integrity_error_handler(request: Request, exc: sqlite3.IntegrityError):
+    return JSONResponse({"detail": str(exc)}, status_code=409)
+
 # Database setup
 DATABASE_PATH = "drawings.db"
+POOL_SIZE = 8
+PREVIEW_POOL_SIZE = 8
+POOL_TIMEOUT = 5  # seconds to wait for a free connection before answering 503
+
+# Long-lived connections shared by all requests, so each request skips the
+# open/close cost and keeps SQLite's per-connection page cache warm
+POOL = queue.Queue(maxsize=POOL_SIZE)
+
+# Read-only connections for preview streams, which hold one for as long as
+# the client takes to download and so are kept apart from POOL
+PREVIEW_POOL = queue.Queue(maxsize=PREVIEW_POOL_SIZE)
+
+# A 64MB page cache plus 256MB of mmap keep hot drawings in memory
+CACHE_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Applied to every pooled connection: WAL lets readers and the writer run
+# concurrently and NORMAL sync only fsyncs at checkpoints
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+) + CACHE_PRAGMAS
+
+def create_connection():
+    """Open a connection suitable for sharing across worker threads"""
+    conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False, isolation_level=None)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def create_preview_connection():
+    """Open a read-only connection for streaming previews"""
+    conn = sqlite3.connect(
+        f"file:{DATABASE_PATH}?mode=ro", uri=True, check_same_thread=False, isolation_level=None
+    )
+    for pragma in CACHE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def init_pool():
+    """Fill the connection pool"""
+    for _ in range(POOL_SIZE):
+        POOL.put(create_connection())
+
+def init_preview_pool():
+    """Fill the preview pool; the database file must already exist"""
+    for _ in range(PREVIEW_POOL_SIZE):
+        PREVIEW_POOL.put(create_preview_connection())
+
+def close_pool():
+    """Drain both connection pools and close every connection"""
+    for pool in (POOL, PREVIEW_POOL):
+        while True:
+            try:
+                conn = pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+def checkout(pool):
+    """Take a connection from a pool, answering 503 if none frees up in time"""
+    try:
+        return pool.get(timeout=POOL_TIMEOUT)
+    except queue.Empty:
+        raise HTTPException(status_code=503, detail="Database is busy, try again later")
+
+@contextmanager
+def get_conn():
+    """Borrow a connection from the pool for the duration of a block"""
+    conn = checkout(POOL)
+    try:
+        yield conn
+    finally:
+        POOL.put(conn)
+
+@contextmanager
+def transaction(conn):
+    """Run a block as one write transaction on an autocommit connection
+    
+    BEGIN IMMEDIATE takes the write lock up front, so the block either
+    commits with a single sync or rolls back entirely.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+# SQL statements, kept as constants so every call reuses the same text and
+# hits sqlite3's per-connection statement cache
+SQL_INSERT = """
+    INSERT INTO drawings (id, name, preview_image, canvas_state, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Listing pages are assembled into a JSON array by SQLite itself, so rows
+# never pass through Python one by one
+SQL_SELECT_PAGE_JSON = """
+    SELECT json_group_array(json_object(
+        'id', id,
+        'name', name,
+        'preview_url', '/drawings/' || id || '/preview',
+        'created_at', created_at,
+        'updated_at', updated_at,
+        'revision', revision
+    ))
+    FROM (
+        SELECT id, name, created_at, updated_at, revision
+        FROM drawings
+        ORDER BY updated_at DESC, id DESC
+        LIMIT ?
+    )
+"""
+
+SQL_SELECT_PAGE_BEFORE_JSON = """
+    SELECT json_group_array(json_object(
+        'id', id,
+        'name', name,
+        'preview_url', '/drawings/' || id || '/preview',
+        'created_at', created_at,
+        'updated_at', updated_at,
+        'revision', revision
+    ))
+    FROM (
+        SELECT id, name, created_at, updated_at, revision
+        FROM drawings
+        WHERE (updated_at, id) < (?, ?)
+        ORDER BY updated_at DESC, id DESC
+        LIMIT ?
+    )
+"""
+
+SQL_SELECT_ONE = """
+    SELECT id, name, canvas_state, created_at, updated_at, revision
+    FROM drawings
+    WHERE id = ?
+"""
+
+SQL_SELECT_VERSION = "SELECT updated_at, revision FROM drawings WHERE id = ?"
+
+SQL_SELECT_ROWID = "SELECT rowid FROM drawings WHERE id = ?"
+
+# Fields passed as NULL keep their current value, so one statement covers
+# every combination of updated fields
+SQL_UPDATE = """
+    UPDATE drawings
+    SET name = COALESCE(?, name),
+        preview_image = COALESCE(?, preview_image),
+        canvas_state = COALESCE(?, canvas_state),
+        updated_at = ?,
+        revision = revision + 1
+    WHERE id = ?
+    RETURNING id, name, preview_image, canvas_state, created_at, updated_at
+"""
+
+# Sizes the preview for a streamed upload, which then fills it in place
+SQL_RESET_PREVIEW = """
+    UPDATE drawings
+    SET preview_image = zeroblob(?),
+        updated_at = ?,
+        revision = revision + 1
+    WHERE id = ?
+    RETURNING rowid
+"""
+
+SQL_DELETE = "DELETE FROM drawings WHERE id = ? RETURNING id"
 
 def init_db():
     """Initialize the SQLite database"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS drawings (
-            id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            preview_image TEXT NOT NULL,
-            canvas_state TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    with get_conn() as conn, transaction(conn):
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS drawings (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                preview_image BLOB NOT NULL,
+                canvas_state BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                revision INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        
+        # updated_at only has second precision, so ETags also use a revision
+        # counter that every update bumps
+        cursor.execute("PRAGMA table_info(drawings)")
+        if "revision" not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE drawings ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        
+        # Serves the newest-first listing and its keyset pagination
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_drawings_updated_at
+            ON drawings (updated_at DESC, id DESC)
+        """)
+        
+        # Older rows kept the preview as base64 text; store the raw image bytes.
+        # Values that were never base64 (e.g. device-local file URIs) can't be
+        # served anyway, so they become empty previews
+        cursor.execute("SELECT rowid, preview_image FROM drawings WHERE typeof(preview_image) = 'text'")
+        for rowid, preview_image in cursor.fetchall():
+            try:
+                raw = pybase64.b64decode(preview_image, validate=True)
+            except ValueError:
+                raw = b""
+            cursor.execute("UPDATE drawings SET preview_image = ? WHERE rowid = ?", (raw, rowid))
+
+# (epoch second, ISO string) for the last timestamp handed out. Audit fields
+# only need second precision, so the string is formatted once per second;
+# the tuple is swapped in whole so threads never see a torn pair
+_timestamp_cache = (0, "")
+
+def now_iso() -> str:
+    """Current UTC time as an ISO 8601 string, cached per second"""
+    global _timestamp_cache
+    now = int(time.time())
+    cached_at, value = _timestamp_cache
+    if now != cached_at:
+        value = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        _timestamp_cache = (now, value)
+    return value
+
+def new_drawing_id() -> str:
+    """Generate a random 128-bit drawing ID as 32 hex characters"""
+    return os.urandom(16).hex()
+
+def decode_preview(preview_image: str) -> bytes:
+    """Decode a base64 preview image into raw bytes for storage"""
+    try:
+        return pybase64.b64decode(preview_image, validate=True)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="preview_image must be valid base64")
+
+def encode_preview(preview_image: bytes) -> str:
+    """Encode a stored preview image as base64 for the response"""
+    return pybase64.b64encode(preview_image).decode("ascii")
+
+# canvas_state is stored zstd-compressed, optionally with a dictionary
+# trained on existing drawings (see train_canvas_dict.py). Every trained
+# dictionary is kept as canvas_state.<dict_id>.zdict, since rows compressed
+# with an older one still need it; CANVAS_DICT_CURRENT_PATH names the one
+# new rows are compressed with
+CANVAS_DICT_PATTERN = "canvas_state.{}.zdict"
+CANVAS_DICT_CURRENT_PATH = "canvas_state.current"
+LEGACY_CANVAS_DICT_PATH = "canvas_state.zdict"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+def load_canvas_dicts():
+    """Load every trained canvas_state dictionary, keyed by dictionary ID"""
+    dicts = {}
+    for path in glob.glob(CANVAS_DICT_PATTERN.format("*")) + [LEGACY_CANVAS_DICT_PATH]:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                dict_data = zstandard.ZstdCompressionDict(f.read())
+            dicts[dict_data.dict_id()] = dict_data
+    return dicts
+
+def load_current_canvas_dict(dicts):
+    """Pick the dictionary new rows are compressed with, if one is trained"""
+    if os.path.exists(CANVAS_DICT_CURRENT_PATH):
+        with open(CANVAS_DICT_CURRENT_PATH) as f:
+            return dicts[int(f.read())]
+    if os.path.exists(LEGACY_CANVAS_DICT_PATH):
+        with open(LEGACY_CANVAS_DICT_PATH, "rb") as f:
+            return dicts[zstandard.ZstdCompressionDict(f.read()).dict_id()]
+    return None
+
+CANVAS_DICTS = load_canvas_dicts()
+CANVAS_DICT = load_current_canvas_dict(CANVAS_DICTS)
+canvas_dicts_lock = threading.Lock()
+
+def get_canvas_dict(dict_id: int):
+    """Dictionary with the given ID, rescanning for ones trained since startup"""
+    global CANVAS_DICTS
+    dict_data = CANVAS_DICTS.get(dict_id)
+    if dict_data is None:
+        with canvas_dicts_lock:
+            CANVAS_DICTS = load_canvas_dicts()
+        dict_data = CANVAS_DICTS.get(dict_id)
+        if dict_data is None:
+            raise ValueError(f"canvas_state needs missing zstd dictionary {dict_id}")
+    return dict_data
+
+# zstd contexts must not be shared between threads, so each worker thread
+# lazily creates its own
+zstd_contexts = threading.local()
+
+def compress_canvas(canvas_json: bytes) -> bytes:
+    """Compress serialized canvas_state JSON for storage"""
+    compressor = getattr(zstd_contexts, "compressor", None)
+    if compressor is None:
+        compressor = zstandard.ZstdCompressor(level=3, dict_data=CANVAS_DICT)
+        zstd_contexts.compressor = compressor
+    return compressor.compress(canvas_json)
+
+def decompress_canvas(canvas_state):
+    """Return stored canvas_state as serialized JSON
+    
+    Rows written before compression was introduced hold plain JSON and are
+    returned unchanged. Frames record the ID of the dictionary they were
+    compressed with (0 for none), which picks the decompressor.
+    """
+    if canvas_state[:4] != ZSTD_MAGIC:
+        return canvas_state
     
-    conn.commit()
-    conn.close()
+    decompressors = getattr(zstd_contexts, "decompressors", None)
+    if decompressors is None:
+        decompressors = zstd_contexts.decompressors = {}
+    
+    dict_id = zstandard.get_frame_parameters(canvas_state).dict_id
+    decompressor = decompressors.get(dict_id)
+    if decompressor is None:
+        if dict_id:
+            decompressor = zstandard.ZstdDecompressor(dict_data=get_canvas_dict(dict_id))
+        else:
+            decompressor = zstandard.ZstdDecompressor()
+        decompressors[dict_id] = decompressor
+    return decompressor.decompress(canvas_state)
+
+def drawing_from_row(row) -> dict:
+    """Build a response dict from a full drawing row
+    
+    canvas_state is already serialized JSON, so it is spliced into the
+    response as an orjson Fragment instead of being parsed and re-encoded.
+    """
+    return {
+        "id": row[0],
+        "name": row[1],
+        "preview_image": encode_preview(row[2]),
+        "canvas_state": orjson.Fragment(decompress_canvas(row[3])),
+        "created_at": row[4],
+        "updated_at": row[5],
+    }
+
+class DrawingCache:
+    """LRU cache of (ETag, serialized body) for GET /drawings/{id}
+    
+    Writers call invalidate() after committing. Readers note the generation
+    before querying and put() drops their body if a write landed in between,
+    so a stale row read concurrently with an update is never cached.
+    """
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.lock = threading.Lock()
+    
+    def get(self, drawing_id: str) -> Optional[Tuple[str, bytes]]:
+        with self.lock:
+            entry = self.entries.get(drawing_id)
+            if entry is not None:
+                self.entries.move_to_end(drawing_id)
+            return entry
+    
+    def put(self, drawing_id: str, etag: str, body: bytes, generation: int):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[drawing_id] = (etag, body)
+            self.entries.move_to_end(drawing_id)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+    
+    def invalidate(self, drawing_id: str):
+        with self.lock:
+            self.generation += 1
+            self.entries.pop(drawing_id, None)
+
+DRAWING_CACHE = DrawingCache(max_size=256)
+
+def drawing_etag(updated_at: str, revision: int) -> str:
+    """Strong ETag for one version of a drawing"""
+    version = f"{updated_at}:{revision}".encode()
+    return '"' + hashlib.blake2b(version, digest_size=8).hexdigest() + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names this ETag
+    
+    If-None-Match uses weak comparison, so a tag that a proxy marked weak
+    (e.g. W/"..." after gzipping) still matches.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in (etag, "*"):
+            return True
+    return False
+
+PREVIEW_CHUNK_SIZE = 65536
+
+BASE64_WHITESPACE = b" \t\n\r\v\f"
+
+def read_base64(upload):
+    """Yield an uploaded base64 file in chunks with whitespace removed"""
+    while chunk := upload.read(PREVIEW_CHUNK_SIZE):
+        yield chunk.translate(None, BASE64_WHITESPACE)
+
+def write_preview_chunk(blob, data: bytes, written: int, size: int) -> int:
+    """Write decoded preview bytes, refusing any that overrun the sized blob"""
+    if written + len(data) > size:
+        raise HTTPException(status_code=400, detail="preview_image must be valid base64")
+    blob.write(data)
+    return len(data)
+
+class PreviewStream:
+    """A preview blob and the preview pool connection it was opened on
+    
+    release() closes the blob and returns the connection, at most once.
+    Reads run in the threadpool and are not cancellable, so release never
+    happens underneath an in-flight read.
+    """
+    
+    def __init__(self, conn, blob):
+        self.conn = conn
+        self.blob = blob
+        self.released = False
+        self.lock = threading.Lock()
+    
+    async def chunks(self):
+        try:
+            while chunk := await run_in_threadpool(self.blob.read, PREVIEW_CHUNK_SIZE):
+                yield chunk
+        finally:
+            self.release()
+    
+    def release(self):
+        with self.lock:
+            if self.released:
+                return
+            self.released = True
+        # An open blob keeps its read transaction alive, so close it first
+        self.blob.close()
+        PREVIEW_POOL.put(self.conn)
 
 # Initialize database on startup
+init_pool()
 init_db()
+init_preview_pool()
+
+@app.on_event("shutdown")
+def shutdown():
+    close_pool()
 
 # Pydantic models
 class DrawingCreate(BaseModel):
@@ -58,6 +579,25 @@ class DrawingUpdate(BaseModel):
     preview_image: Optional[str] = None
     canvas_state: Optional[dict] = None
 
+class DrawingBatch(BaseModel):
+    items: List[DrawingCreate]
+
+class DrawingSummary(BaseModel):
+    id: str
+    name: str
+    preview_url: str
+    created_at: str
+    updated_at: str
+    revision: int
+
+class DrawingDetail(BaseModel):
+    id: str
+    name: str
+    preview_url: str
+    canvas_state: dict
+    created_at: str
+    updated_at: str
+
 class DrawingResponse(BaseModel):
     id: str
     name: str
@@ -67,204 +607,267 @@ class DrawingResponse(BaseModel):
     updated_at: str
 
 # API Endpoints
+# Endpoints that touch SQLite are plain functions so FastAPI runs them in its
+# threadpool; blocking database calls would otherwise stall the event loop
 
 @app.get("/")
 async def root():
     return {"message": "Drawing App API is running"}
 
 @app.post("/drawings", response_model=DrawingResponse)
-async def create_drawing(drawing: DrawingCreate):
+def create_drawing(drawing: DrawingCreate):
     """Create a new drawing"""
-    try:
-        drawing_id = str(uuid.uuid4())
-        current_time = datetime.now().isoformat()
-        
-        conn = sqlite3.connect(DATABASE_PATH)
+    drawing_id = new_drawing_id()
+    current_time = now_iso()
+    canvas_state = orjson.dumps(drawing.canvas_state)
+    
+    with get_conn() as conn:
         cursor = conn.cursor()
         
-        cursor.execute("""
-            INSERT INTO drawings (id, name, preview_image, canvas_state, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
+        cursor.execute(SQL_INSERT, (
             drawing_id,
             drawing.name,
-            drawing.preview_image,
-            json.dumps(drawing.canvas_state),
+            decode_preview(drawing.preview_image),
+            compress_canvas(canvas_state),
             current_time,
             current_time
         ))
-        
-        conn.commit()
-        conn.close()
-        
-        return DrawingResponse(
-            id=drawing_id,
-            name=drawing.name,
-            preview_image=drawing.preview_image,
-            canvas_state=drawing.canvas_state,
-            created_at=current_time,
-            updated_at=current_time
+    
+    # Echo the request back without building and re-validating a model
+    return ORJSONResponse({
+        "id": drawing_id,
+        "name": drawing.name,
+        "preview_image": drawing.preview_image,
+        "canvas_state": orjson.Fragment(canvas_state),
+        "created_at": current_time,
+        "updated_at": current_time,
+    })
+
+@app.post("/drawings/batch", response_model=List[DrawingResponse])
+def create_drawings(batch: DrawingBatch):
+    """Create several drawings in one transaction"""
+    current_time = now_iso()
+    canvas_states = [orjson.dumps(drawing.canvas_state) for drawing in batch.items]
+    rows = [
+        (
+            new_drawing_id(),
+            drawing.name,
+            decode_preview(drawing.preview_image),
+            compress_canvas(canvas_state),
+            current_time,
+            current_time
         )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to create drawing: {str(e)}")
+        for drawing, canvas_state in zip(batch.items, canvas_states)
+    ]
+    
+    with get_conn() as conn, transaction(conn):
+        conn.executemany(SQL_INSERT, rows)
+    
+    return ORJSONResponse([
+        {
+            "id": row[0],
+            "name": drawing.name,
+            "preview_image": drawing.preview_image,
+            "canvas_state": orjson.Fragment(canvas_state),
+            "created_at": current_time,
+            "updated_at": current_time,
+        }
+        for row, drawing, canvas_state in zip(rows, batch.items, canvas_states)
+    ])
 
-@app.get("/drawings", response_model=List[DrawingResponse])
-async def get_drawings():
-    """Get all drawings"""
-    try:
-        conn = sqlite3.connect(DATABASE_PATH)
+@app.get("/drawings", response_model=List[DrawingSummary])
+def get_drawings(
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None,
+    before_id: str = ""
+):
+    """Get a page of drawings, newest first, with links to their previews
+    
+    Pass the updated_at and id of the last drawing of a page as before and
+    before_id to fetch the next one.
+    """
+    with get_conn() as conn:
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT id, name, preview_image, canvas_state, created_at, updated_at
-            FROM drawings
-            ORDER BY updated_at DESC
-        """)
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        drawings = []
-        for row in rows:
-            drawings.append(DrawingResponse(
-                id=row[0],
-                name=row[1],
-                preview_image=row[2],
-                canvas_state=json.loads(row[3]),
-                created_at=row[4],
-                updated_at=row[5]
-            ))
-        
-        return drawings
+        if before is None:
+            cursor.execute(SQL_SELECT_PAGE_JSON, (limit,))
+        else:
+            cursor.execute(SQL_SELECT_PAGE_BEFORE_JSON, (before, before_id, limit))
         
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get drawings: {str(e)}")
+        drawings = cursor.fetchone()[0]
+    
+    return Response(drawings, media_type="application/json")
 
-@app.get("/drawings/{drawing_id}", response_model=DrawingResponse)
-async def get_drawing(drawing_id: str):
-    """Get a specific drawing by ID"""
-    try:
-        conn = sqlite3.connect(DATABASE_PATH)
+@app.get("/drawings/{drawing_id}", response_model=DrawingDetail)
+def get_drawing(drawing_id: str, request: Request):
+    """Get a specific drawing by ID
+    
+    Responses carry an ETag; a matching If-None-Match gets a bodiless 304.
+    """
+    cached = DRAWING_CACHE.get(drawing_id)
+    if cached is not None:
+        etag, body = cached
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(body, media_type="application/json", headers={"ETag": etag})
+    
+    generation = DRAWING_CACHE.generation
+    with get_conn() as conn:
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT id, name, preview_image, canvas_state, created_at, updated_at
-            FROM drawings
-            WHERE id = ?
-        """, (drawing_id,))
+        # Check the version first so an unchanged drawing costs one lookup
+        cursor.execute(SQL_SELECT_VERSION, (drawing_id,))
+        version = cursor.fetchone()
+        if not version:
+            raise HTTPException(status_code=404, detail="Drawing not found")
         
-        row = cursor.fetchone()
-        conn.close()
+        etag = drawing_etag(*version)
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        cursor.execute(SQL_SELECT_ONE, (drawing_id,))
         
+        row = cursor.fetchone()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Drawing not found")
+    
+    # The preview is served separately so image bytes stay out of the JSON
+    body = orjson.dumps({
+        "id": row[0],
+        "name": row[1],
+        "preview_url": f"/drawings/{row[0]}/preview",
+        "canvas_state": orjson.Fragment(decompress_canvas(row[2])),
+        "created_at": row[3],
+        "updated_at": row[4],
+    })
+    # The row may have changed since the version check, so tag what was read
+    etag = drawing_etag(row[4], row[5])
+    DRAWING_CACHE.put(drawing_id, etag, body, generation)
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+@app.get("/drawings/{drawing_id}/preview", response_class=StreamingResponse)
+def get_drawing_preview(drawing_id: str):
+    """Stream a drawing's preview image"""
+    conn = checkout(PREVIEW_POOL)
+    try:
+        row = conn.execute(SQL_SELECT_ROWID, (drawing_id,)).fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Drawing not found")
         
-        return DrawingResponse(
-            id=row[0],
-            name=row[1],
-            preview_image=row[2],
-            canvas_state=json.loads(row[3]),
-            created_at=row[4],
-            updated_at=row[5]
-        )
-        
-    except HTTPException:
+        blob = conn.blobopen("drawings", "preview_image", row[0], readonly=True)
+    except BaseException:
+        PREVIEW_POOL.put(conn)
         raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get drawing: {str(e)}")
+    
+    # If the client disconnects while the generator is suspended, the
+    # background task still returns the connection
+    stream = PreviewStream(conn, blob)
+    return StreamingResponse(
+        stream.chunks(),
+        media_type="image/png",
+        headers={"Content-Length": str(len(blob))},
+        background=BackgroundTask(stream.release)
+    )
+
+@app.post("/drawings/{drawing_id}/preview")
+def upload_drawing_preview(drawing_id: str, file: UploadFile = File(...)):
+    """Replace a drawing's preview from an uploaded base64 file
+    
+    The upload is decoded chunk by chunk straight into the stored blob, so
+    neither the full base64 text nor the full image is held in memory.
+    Line breaks and other whitespace, as written by the base64 CLI, are
+    ignored.
+    """
+    upload = file.file
+    upload.seek(0)
+    
+    # First pass: size the decoded image from the base64 text alone
+    encoded_size = 0
+    tail = b""
+    for chunk in read_base64(upload):
+        encoded_size += len(chunk)
+        tail = (tail + chunk)[-2:]
+    if encoded_size % 4:
+        raise HTTPException(status_code=400, detail="preview_image must be valid base64")
+    size = encoded_size // 4 * 3 - (len(tail) - len(tail.rstrip(b"=")))
+    upload.seek(0)
+    
+    with get_conn() as conn, transaction(conn):
+        row = conn.execute(SQL_RESET_PREVIEW, (size, now_iso(), drawing_id)).fetchone()
+        if not row:
+            raise HTTPException(status_code=404, detail="Drawing not found")
+        
+        # Second pass: decode whole 4-byte groups and carry the rest. The last
+        # group is always held back, since only the final one may be padded
+        with conn.blobopen("drawings", "preview_image", row[0]) as blob:
+            written = 0
+            pending = b""
+            for chunk in read_base64(upload):
+                pending += chunk
+                cut = (len(pending) - 1) // 4 * 4
+                if b"=" in pending[:cut]:
+                    raise HTTPException(status_code=400, detail="preview_image must be valid base64")
+                written += write_preview_chunk(blob, decode_preview(pending[:cut]), written, size)
+                pending = pending[cut:]
+            written += write_preview_chunk(blob, decode_preview(pending), written, size)
+            if written != size:
+                raise HTTPException(status_code=400, detail="preview_image must be valid base64")
+
+    DRAWING_CACHE.invalidate(drawing_id)
+    
+    return {"message": "Preview updated successfully"}
 
 @app.put("/drawings/{drawing_id}", response_model=DrawingResponse)
-async def update_drawing(drawing_id: str, drawing: DrawingUpdate):
+def update_drawing(drawing_id: str, drawing: DrawingUpdate):
     """Update an existing drawing"""
-    try:
-        conn = sqlite3.connect(DATABASE_PATH)
+    if drawing.name is None and drawing.preview_image is None and drawing.canvas_state is None:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    
+    preview_image = None
+    if drawing.preview_image is not None:
+        preview_image = decode_preview(drawing.preview_image)
+    
+    canvas_state = None
+    if drawing.canvas_state is not None:
+        canvas_state = compress_canvas(orjson.dumps(drawing.canvas_state))
+    
+    with get_conn() as conn:
         cursor = conn.cursor()
         
-        # Check if drawing exists
-        cursor.execute("SELECT id FROM drawings WHERE id = ?", (drawing_id,))
-        if not cursor.fetchone():
-            conn.close()
-            raise HTTPException(status_code=404, detail="Drawing not found")
-        
-        # Build update query dynamically
-        update_fields = []
-        update_values = []
-        
-        if drawing.name is not None:
-            update_fields.append("name = ?")
-            update_values.append(drawing.name)
-        
-        if drawing.preview_image is not None:
-            update_fields.append("preview_image = ?")
-            update_values.append(drawing.preview_image)
-        
-        if drawing.canvas_state is not None:
-            update_fields.append("canvas_state = ?")
-            update_values.append(json.dumps(drawing.canvas_state))
-        
-        if not update_fields:
-            conn.close()
-            raise HTTPException(status_code=400, detail="No fields to update")
-        
-        current_time = datetime.now().isoformat()
-        update_fields.append("updated_at = ?")
-        update_values.append(current_time)
-        update_values.append(drawing_id)
-        
-        cursor.execute(f"""
-            UPDATE drawings 
-            SET {', '.join(update_fields)}
-            WHERE id = ?
-        """, update_values)
-        
-        # Get updated drawing
-        cursor.execute("""
-            SELECT id, name, preview_image, canvas_state, created_at, updated_at
-            FROM drawings
-            WHERE id = ?
-        """, (drawing_id,))
+        # A missing drawing updates nothing and returns no row
+        cursor.execute(SQL_UPDATE, (
+            drawing.name,
+            preview_image,
+            canvas_state,
+            now_iso(),
+            drawing_id
+        ))
         
         row = cursor.fetchone()
-        conn.commit()
-        conn.close()
-        
-        return DrawingResponse(
-            id=row[0],
-            name=row[1],
-            preview_image=row[2],
-            canvas_state=json.loads(row[3]),
-            created_at=row[4],
-            updated_at=row[5]
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to update drawing: {str(e)}")
+    
+    DRAWING_CACHE.invalidate(drawing_id)
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Drawing not found")
+    
+    return ORJSONResponse(drawing_from_row(row))
 
 @app.delete("/drawings/{drawing_id}")
-async def delete_drawing(drawing_id: str):
+def delete_drawing(drawing_id: str):
     """Delete a drawing"""
-    try:
-        conn = sqlite3.connect(DATABASE_PATH)
+    with get_conn() as conn:
         cursor = conn.cursor()
         
-        cursor.execute("DELETE FROM drawings WHERE id = ?", (drawing_id,))
-        
-        if cursor.rowcount == 0:
-            conn.close()
-            raise HTTPException(status_code=404, detail="Drawing not found")
-        
-        conn.commit()
-        conn.close()
-        
-        return {"message": "Drawing deleted successfully"}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to delete drawing: {str(e)}")
+        cursor.execute(SQL_DELETE, (drawing_id,))
+        row = cursor.fetchone()
+    
+    DRAWING_CACHE.invalidate(drawing_id)
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Drawing not found")
+    
+    return {"message": "Drawing deleted successfully"}
 
 if __name__ == "__main__":
     import uvicorn
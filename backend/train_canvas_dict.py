@@ -0,0 +1,59 @@
+"""Train the zstd dictionary used to compress canvas_state
+
+Samples every stored drawing, saves the new dictionary under its ID,
+recompresses all rows with it and then marks it as the current one. Older
+dictionaries are kept, so rows still compressed with them stay readable;
+the server starts compressing new drawings with the new dictionary once it
+restarts.
+
+Usage:
+    python train_canvas_dict.py
+"""
+import os
+import sys
+
+import zstandard
+
+from main import (
+    CANVAS_DICT_CURRENT_PATH, CANVAS_DICT_PATTERN, get_conn, transaction, decompress_canvas
+)
+
+DICT_SIZE = 100_000
+
+def write_durably(path, data):
+    """Write a file in full before it replaces anything at path"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+def main():
+    with get_conn() as conn:
+        rows = conn.execute("SELECT rowid, canvas_state FROM drawings").fetchall()
+        samples = [decompress_canvas(canvas_state) for _, canvas_state in rows]
+        samples = [s.encode() if isinstance(s, str) else s for s in samples]
+
+        try:
+            dict_data = zstandard.train_dictionary(DICT_SIZE, samples)
+        except zstandard.ZstdError as e:
+            sys.exit(f"Could not train a dictionary from {len(samples)} drawings: {e}")
+
+        # The dictionary must be on disk before any row depends on it
+        dict_path = CANVAS_DICT_PATTERN.format(dict_data.dict_id())
+        write_durably(dict_path, dict_data.as_bytes())
+
+        compressor = zstandard.ZstdCompressor(level=3, dict_data=dict_data)
+        with transaction(conn):
+            conn.executemany(
+                "UPDATE drawings SET canvas_state = ? WHERE rowid = ?",
+                [(compressor.compress(sample), rowid) for (rowid, _), sample in zip(rows, samples)]
+            )
+
+    write_durably(CANVAS_DICT_CURRENT_PATH, str(dict_data.dict_id()).encode())
+
+    print(f"Trained {dict_path} from {len(samples)} drawings")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 // API service for backend integration
+import { File } from 'expo-file-system';
 import { DrawingState, SavedDrawing } from '../types/Drawing';
 import API_CONFIG from '../config/api';
 
 // Configuration
 const API_BASE_URL = API_CONFIG.BASE_URL;
 const API_TIMEOUT = API_CONFIG.TIMEOUT;
+const DRAWINGS_PAGE_SIZE = 100;
 
 // API Response types
 interface ApiDrawingResponse {
@@ -16,6 +18,24 @@ interface ApiDrawingResponse {
   updated_at: string;
 }
 
+interface ApiDrawingSummary {
+  id: string;
+  name: string;
+  preview_url: string;
+  created_at: string;
+  updated_at: string;
+  revision: number;
+}
+
+interface ApiDrawingDetail {
+  id: string;
+  name: string;
+  preview_url: string;
+  canvas_state: DrawingState;
+  created_at: string;
+  updated_at: string;
+}
+
 interface ApiCreateDrawingRequest {
   name: string;
   preview_image: string;
@@ -36,12 +56,15 @@ const ensureDataUri = (base64String: string): string => {
   return `data:image/png;base64,${base64String}`;
 };
 
-// Utility function to extract base64 from data URI
-const extractBase64 = (dataUri: string): string => {
-  if (dataUri.startsWith('data:')) {
-    return dataUri.split(',')[1] || dataUri;
+// Utility function to extract base64 from a data URI or read it from a local file
+const extractBase64 = async (imageUri: string): Promise<string> => {
+  if (imageUri.startsWith('data:')) {
+    return imageUri.split(',')[1] || imageUri;
+  }
+  if (imageUri.startsWith('file:')) {
+    return new File(imageUri).base64();
   }
-  return dataUri;
+  return imageUri;
 };
 
 // API service class
@@ -80,7 +103,7 @@ class DrawingApiService {
     try {
       const requestData: ApiCreateDrawingRequest = {
         name,
-        preview_image: extractBase64(previewImageUri),
+        preview_image: await extractBase64(previewImageUri),
         canvas_state: canvasState,
       };
 
@@ -112,18 +135,35 @@ class DrawingApiService {
 
   async getDrawings(): Promise<SavedDrawing[]> {
     try {
-      const response = await this.fetchWithTimeout(`${API_BASE_URL}/drawings`);
+      const data: ApiDrawingSummary[] = [];
+      let cursor = '';
 
-      if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-      }
+      // The list endpoint is paginated; follow the keyset cursor to the last page
+      while (true) {
+        const response = await this.fetchWithTimeout(
+          `${API_BASE_URL}/drawings?limit=${DRAWINGS_PAGE_SIZE}${cursor}`
+        );
 
-      const data: ApiDrawingResponse[] = await response.json();
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+
+        const page: ApiDrawingSummary[] = await response.json();
+        data.push(...page);
+
+        if (page.length < DRAWINGS_PAGE_SIZE) {
+          break;
+        }
+        const last = page[page.length - 1];
+        cursor = `&before=${encodeURIComponent(last.updated_at)}&before_id=${encodeURIComponent(last.id)}`;
+      }
 
       return data.map(drawing => ({
         id: drawing.id,
         name: drawing.name,
-        previewUri: ensureDataUri(drawing.preview_image),
+        // Versioned by revision, which every update bumps, so image caches
+        // refetch the preview even after two updates in the same second
+        previewUri: `${API_BASE_URL}${drawing.preview_url}?v=${drawing.revision}`,
         stateUri: `api:${drawing.id}`,
         createdAt: new Date(drawing.created_at).getTime(),
         updatedAt: new Date(drawing.updated_at).getTime(),
@@ -146,7 +186,7 @@ class DrawingApiService {
         throw new Error(`HTTP ${response.status}: ${response.statusText}`);
       }
 
-      const data: ApiDrawingResponse = await response.json();
+      const data: ApiDrawingDetail = await response.json();
       return data.canvas_state;
     } catch (error) {
       console.error('Failed to get drawing via API:', error);
@@ -167,7 +207,7 @@ class DrawingApiService {
         requestData.name = name;
       }
       if (previewImageUri !== undefined) {
-        requestData.preview_image = extractBase64(previewImageUri);
+        requestData.preview_image = await extractBase64(previewImageUri);
       }
       if (canvasState !== undefined) {
         requestData.canvas_state = canvasState;